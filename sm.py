@@ -1,8 +1,17 @@
 #!/usr/bin/env python3
 
+import heapq
+import itertools
+import os
 import random
+import sys
+import time
+from array import array
 from enum import Enum
-from typing import List, Optional, Dict
+from typing import List, NamedTuple, Optional, Dict, Tuple
+
+# Modules only the CLI, optimizer, sweeps and history spill need (argparse, concurrent.futures,
+# contextlib, hashlib, json) are imported where they're used, to keep plain game startup fast.
 
 class CardType(Enum):
     ENGINEER = "Engineer"
@@ -25,6 +34,35 @@ class Vulnerability(Enum):
     MODERATE = "Moderate"
     HIGH = "High"
 
+class RuleConfig(NamedTuple):
+    """Game constants. Immutable and hashable, so variants can key results and cross process boundaries."""
+    win_uptime: int = 20              # Uptime Points needed to win
+    starting_health: int = 20         # Service Health each player starts with
+    opening_hand: int = 5             # Cards drawn before the first turn
+    starting_bandwidth: int = 1       # Bandwidth in the pool before the first turn
+    base_bandwidth: int = 1           # Bandwidth generated per turn before Bandwidth cards
+    uptime_cadence: int = 3           # Services generate UP every this many turns
+    starting_security_posture: int = 50
+    incident_chance_floor: int = 10   # Minimum percent incident chance, however good security is
+    exposure_incident_chance: int = 5  # Extra percent incident chance per point of exposure
+    
+    def validate(self) -> "RuleConfig":
+        """Raise ValueError if these rules can't produce a playable game"""
+        for field in ("win_uptime", "starting_health", "base_bandwidth", "uptime_cadence"):
+            if getattr(self, field) < 1:
+                raise ValueError(f"{field} must be at least 1, got {getattr(self, field)}")
+        for field in ("opening_hand", "starting_bandwidth"):
+            if getattr(self, field) < 0:
+                raise ValueError(f"{field} can't be negative, got {getattr(self, field)}")
+        for field in ("starting_security_posture", "incident_chance_floor"):
+            if not 0 <= getattr(self, field) <= 100:
+                raise ValueError(f"{field} must be 0-100, got {getattr(self, field)}")
+        if self.exposure_incident_chance < 0:
+            raise ValueError(f"exposure_incident_chance can't be negative, got {self.exposure_incident_chance}")
+        return self
+
+STANDARD_RULES = RuleConfig()
+
 class Card:
     def __init__(self, name: str, cost: int, card_type: CardType, description: str = ""):
         self.name = name
@@ -64,7 +102,7 @@ class Service(Card):
         self.turns_deployed = 0
     
     def __str__(self):
-        return f"{self.name} ({self.cost}B) - {self.health}HP, +{self.uptime_yield}UP/3turns, Vuln: {self.vulnerability.value}"
+        return f"{self.name} ({self.cost}B) - {self.health}HP, +{self.uptime_yield}UP/cycle, Vuln: {self.vulnerability.value}"
 
 class Incident(Card):
     def __init__(self, name: str, severity: Severity, effect: str, mitigation_cost: int = 0, description: str = ""):
@@ -108,12 +146,29 @@ class Bandwidth(Card):
     def __str__(self):
         return f"{self.name} - Provides {self.bandwidth_value} Bandwidth"
 
+# Card display strings, keyed by everything a card's __str__ can show. Card
+# definitions never change apart from health, so each label is formatted once.
+_card_labels = {}
+
+def card_key(card: Card) -> Tuple:
+    return (card.__class__, card.name, card.cost, getattr(card, "health", None))
+
+def card_label(card: Card) -> str:
+    """Cached str(card)"""
+    key = card_key(card)
+    label = _card_labels.get(key)
+    if label is None:
+        label = _card_labels[key] = str(card)
+    return label
+
 class Player:
     def __init__(self, name: str, deck: List[Card], is_human: bool = True):
         self.name = name
+        self.rules = STANDARD_RULES  # Replaced by the game's rules when it calls setup()
         self.deck = deck.copy()
         self.hand = []
         self.is_human = is_human  # True for human players, False for AI
+        self.turn_actions = []  # Names of cards played this turn
         
         # Infrastructure state
         self.engineers = []  # Deployed engineers
@@ -123,19 +178,46 @@ class Player:
         self.upgrades = []   # Deployed upgrades
         self.bandwidth_sources = []  # Deployed bandwidth cards
         
-        # Resources
-        self.bandwidth = 1  # Current available bandwidth
-        self.max_bandwidth = 1  # Maximum bandwidth generation per turn
+        # Resources (starting values come from the rules, see setup())
+        self.bandwidth = 0  # Current available bandwidth
+        self.max_bandwidth = 0  # Maximum bandwidth generation per turn
         self.uptime_points = 0
-        self.service_health = 20  # Overall service health
+        self.service_health = 0  # Overall service health
         self.team_morale = 0
-        self.security_posture = 50  # 0-100 scale
+        self.security_posture = 0  # 0-100 scale
         self.tech_debt_tokens = 0
         self.blameless_culture = 50  # Hidden metric
         
+        self.dealt = False    # Whether the deck has been shuffled and an opening hand drawn
+        self.started = False  # Whether this player has taken a turn
+        self.setup(STANDARD_RULES)
+    
+    def setup(self, rules: RuleConfig):
+        """Apply a game's rules: starting resources and the opening hand.
+
+        The deck is shuffled and dealt only once. Until the player's first turn,
+        calling this again just resets the resources and draws or returns cards
+        so the hand matches the new opening hand size; after that it only
+        switches the rules.
+        """
+        self.rules = rules
+        if self.started:
+            return
+        self.bandwidth = rules.starting_bandwidth
+        self.max_bandwidth = rules.base_bandwidth
+        self.service_health = rules.starting_health
+        self.security_posture = rules.starting_security_posture
+        
         # Shuffle deck and draw starting hand
-        random.shuffle(self.deck)
-        self.draw_cards(5)
+        if not self.dealt:
+            if isinstance(self.deck, LazyDeck):
+                self.deck.shuffle()
+            else:
+                random.shuffle(self.deck)
+            self.dealt = True
+        while len(self.hand) > rules.opening_hand:
+            self.deck.append(self.hand.pop())  # Back on top, as if it was never drawn
+        self.draw_cards(rules.opening_hand - len(self.hand))
     
     def draw_cards(self, num: int = 1):
         """Draw cards from deck to hand"""
@@ -156,6 +238,7 @@ class Player:
             if card.cost <= self.bandwidth:
                 self.bandwidth -= card.cost
                 played_card = self.hand.pop(card_index)
+                self.turn_actions.append(played_card.name)
                 
                 # Deploy based on card type
                 if isinstance(played_card, Engineer):
@@ -202,10 +285,12 @@ class Player:
     
     def start_turn(self):
         """Actions at the start of each turn"""
+        rules = self.rules
+        self.started = True
+        
         # Calculate max bandwidth from bandwidth cards
-        base_bandwidth = 1  # Everyone starts with 1 base bandwidth
         bandwidth_from_cards = sum(card.bandwidth_value for card in self.bandwidth_sources)
-        self.max_bandwidth = base_bandwidth + bandwidth_from_cards
+        self.max_bandwidth = rules.base_bandwidth + bandwidth_from_cards
         
         # Add new bandwidth to existing pool (like MTG lands)
         self.bandwidth += self.max_bandwidth
@@ -218,7 +303,7 @@ class Player:
         # Service uptime generation
         for service in self.services:
             service.turns_deployed += 1
-            if service.turns_deployed % 3 == 0:  # Every 3 turns
+            if service.turns_deployed % rules.uptime_cadence == 0:
                 self.uptime_points += service.uptime_yield
                 print(f"{service.name} generated {service.uptime_yield} UP!")
         
@@ -233,15 +318,22 @@ class Player:
         self.draw_cards(1)
         print(f"\n=== {self.name}'s Turn ===")
         print(f"Bandwidth: {self.bandwidth} (Generated {self.max_bandwidth} this turn)")
-        print(f"Uptime Points: {self.uptime_points}/20")
-        print(f"Service Health: {self.service_health}/20")
+        print(f"Uptime Points: {self.uptime_points}/{rules.win_uptime}")
+        print(f"Service Health: {self.service_health}/{rules.starting_health}")
         print(f"Team Morale: {self.team_morale}")
     
+    def hand_lines(self) -> List[str]:
+        """Lines describing the player's hand"""
+        return [f"{self.name}'s Hand:"] + [f"{i + 1}. {card_label(card)}" for i, card in enumerate(self.hand)]
+    
+    def hand_signature(self) -> Tuple:
+        """Changes whenever hand_lines() would"""
+        return tuple(map(card_key, self.hand))
+    
     def show_hand(self):
         """Display player's hand"""
-        print(f"\n{self.name}'s Hand:")
-        for i, card in enumerate(self.hand):
-            print(f"{i + 1}. {card}")
+        print()
+        print("\n".join(self.hand_lines()))
     
     def ai_play_turn(self):
         """AI decision making for computer players"""
@@ -275,7 +367,7 @@ class Player:
         
         print(f"🤖 {self.name} ends turn.")
     
-    def show_infrastructure(self):
+    def ai_choose_card(self) -> Optional[int]:
         """AI card selection logic"""
         affordable_cards = []
         
@@ -343,52 +435,378 @@ class Player:
             return best_choice[0]
         
         return None
+    
+    def infrastructure_lines(self) -> List[str]:
+        """Lines describing deployed infrastructure"""
+        lines = [f"{self.name}'s Infrastructure:"]
+        
+        for title, cards in (("Engineers", self.engineers), ("Services", self.services), ("Tools", self.tools)):
+            if cards:
+                lines.append(f"{title}:")
+                lines.extend(f"  - {card_label(card)}" for card in cards)
+        
+        if self.environment:
+            lines.append(f"Environment: {card_label(self.environment)}")
+        
+        for title, cards in (("Upgrades", self.upgrades), ("Bandwidth Sources", self.bandwidth_sources)):
+            if cards:
+                lines.append(f"{title}:")
+                lines.extend(f"  - {card_label(card)}" for card in cards)
+        
+        return lines
+    
+    def infrastructure_signature(self) -> Tuple:
+        """Changes whenever infrastructure_lines() would"""
+        zones = (self.engineers, self.services, self.tools, self.upgrades, self.bandwidth_sources)
+        environment = card_key(self.environment) if self.environment else None
+        return tuple(tuple(map(card_key, zone)) for zone in zones) + (environment,)
+    
+    def show_infrastructure(self):
         """Display deployed infrastructure"""
-        print(f"\n{self.name}'s Infrastructure:")
+        print()
+        print("\n".join(self.infrastructure_lines()))
+
+class IncidentEffect(NamedTuple):
+    attribute: str  # Player counter the incident reduces
+    amount: int
+    delayed: bool   # True for "next turn" effects
+
+class IncidentEngine:
+    """Weighted incident sampling using precomputed alias tables.
+
+    Incident weights depend on severity, the target's security posture and its
+    exposure (deployed service vulnerability plus environment). Tables are built
+    once per (posture bucket, exposure) pair and cached, so each roll is O(1)
+    however large the incident pool gets.
+    """
+
+    EFFECT_ATTRIBUTES = {
+        "Bandwidth": "bandwidth",
+        "Service Health": "service_health",
+        "Uptime Point": "uptime_points",
+        "Uptime Points": "uptime_points",
+    }
+    SEVERITY_WEIGHTS = {Severity.LOW: 4, Severity.MODERATE: 3, Severity.HIGH: 2, Severity.CRITICAL: 1}
+    SEVERITY_RANKS = {Severity.LOW: 0, Severity.MODERATE: 1, Severity.HIGH: 2, Severity.CRITICAL: 3}
+    VULNERABILITY_EXPOSURE = {Vulnerability.LOW: 0, Vulnerability.MODERATE: 1, Vulnerability.HIGH: 2}
+    ENVIRONMENT_EXPOSURE = {"Public Cloud": 1, "On-Premises": -1}
+    MAX_EXPOSURE = 8
+    
+    def __init__(self, incidents: List[Incident]):
+        if not incidents:
+            raise ValueError("Incident pool is empty")
+        self.incidents = incidents
+        self.effects = [self.parse_effect(incident) for incident in incidents]
+        self.tables = {}  # (posture bucket, exposure) -> (probabilities, aliases)
+    
+    @classmethod
+    def parse_effect(cls, incident: Incident) -> IncidentEffect:
+        # Effects look like "-2 Service Health" or "-3 Bandwidth next turn"
+        text = incident.effect
+        delayed = text.endswith(" next turn")
+        if delayed:
+            text = text[:-len(" next turn")]
+        amount, _, target = text.partition(" ")
+        if not (amount.startswith("-") and amount[1:].isdigit()) or target not in cls.EFFECT_ATTRIBUTES:
+            raise ValueError(f"Unsupported incident effect for {incident.name}: {incident.effect!r}")
+        return IncidentEffect(cls.EFFECT_ATTRIBUTES[target], int(amount[1:]), delayed)
+    
+    def exposure(self, player) -> int:
+        """Vulnerability of a player's deployed services, adjusted by their environment"""
+        score = sum(self.VULNERABILITY_EXPOSURE[service.vulnerability] for service in player.services)
+        if player.environment:
+            score += self.ENVIRONMENT_EXPOSURE.get(player.environment.name, 0)
+        return max(0, min(self.MAX_EXPOSURE, score))
+    
+    def incident_chance(self, player, rules: RuleConfig) -> int:
+        """Percent chance of an incident; higher security posture and lower exposure mean fewer"""
+        chance = 100 - player.security_posture + rules.exposure_incident_chance * self.exposure(player)
+        return max(rules.incident_chance_floor, min(100, chance))
+    
+    def _build_table(self, posture_bucket: int, exposure: int) -> Tuple[List[float], List[int]]:
+        """Vose's alias method over the incident pool for one posture/exposure combination"""
+        # Weak posture and high exposure shift weight towards the severe incidents
+        pressure = exposure / 4 + (10 - posture_bucket) / 10
+        weights = [self.SEVERITY_WEIGHTS[incident.severity] * (1 + self.SEVERITY_RANKS[incident.severity] * pressure)
+                   for incident in self.incidents]
         
-        if self.engineers:
-            print("Engineers:")
-            for engineer in self.engineers:
-                print(f"  - {engineer}")
+        n = len(weights)
+        total = sum(weights)
+        scaled = [weight * n / total for weight in weights]
+        probabilities = [1.0] * n
+        aliases = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
         
-        if self.services:
-            print("Services:")
-            for service in self.services:
-                print(f"  - {service}")
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probabilities[less] = scaled[less]
+            aliases[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
         
-        if self.tools:
-            print("Tools:")
-            for tool in self.tools:
-                print(f"  - {tool}")
+        return probabilities, aliases
+    
+    def table(self, player) -> Tuple[List[float], List[int]]:
+        key = (max(0, min(10, player.security_posture // 10)), self.exposure(player))
+        table = self.tables.get(key)
+        if table is None:
+            table = self.tables[key] = self._build_table(*key)
+        return table
+    
+    def roll(self, player, rules: RuleConfig) -> Optional[Tuple[Incident, IncidentEffect]]:
+        """Roll for an incident against a player; return the incident and its effect, or None"""
+        if random.randint(1, 100) > self.incident_chance(player, rules):
+            return None
         
-        if self.environment:
-            print(f"Environment: {self.environment}")
+        probabilities, aliases = self.table(player)
+        u = random.random() * len(probabilities)
+        index = int(u)
+        if u - index >= probabilities[index]:
+            index = aliases[index]
+        return self.incidents[index], self.effects[index]
+
+def create_incident_pool() -> List[Incident]:
+    """Create the standard random incident pool"""
+    return [
+        Incident("DDoS Attack", Severity.HIGH, "-3 Bandwidth next turn", 2),
+        Incident("Memory Leak", Severity.MODERATE, "-2 Service Health", 1),
+        Incident("SSL Certificate Expired", Severity.LOW, "-1 Uptime Point", 1),
+        Incident("Database Corruption", Severity.CRITICAL, "-5 Service Health", 3),
+    ]
+
+_incident_engine = None
+
+def get_incident_engine() -> IncidentEngine:
+    """Shared engine for the standard incident pool, so its tables are built only once"""
+    global _incident_engine
+    if _incident_engine is None:
+        _incident_engine = IncidentEngine(create_incident_pool())
+    return _incident_engine
+
+class TerminalRenderer:
+    """Keeps a status frame pinned to the top of the terminal and redraws only changed lines.
+
+    With ANSI support the frame sits above a scroll region that holds the normal
+    game log, so updates cost a few cursor moves instead of a full reprint. Without
+    it (pipes, dumb terminals, STACK_MASTERS_PLAIN=1) frames are appended as plain
+    text, and only when they change.
+    """
+
+    def __init__(self, stream=None, ansi: Optional[bool] = None):
+        self.stream = stream or sys.stdout
+        if ansi is None:
+            ansi = (self.stream.isatty() and os.environ.get("TERM", "dumb") != "dumb"
+                    and not os.environ.get("STACK_MASTERS_PLAIN"))
+        self.ansi = ansi
+        self.sections = {}  # Section name -> (signature, lines)
+        self.frame = []     # Lines currently on screen
+        self.rows = 0       # Terminal height the frame was laid out for
+        self.pinned = False
+    
+    def section(self, name: str, signature, build) -> List[str]:
+        """Return a section's lines, calling build() only if its signature changed"""
+        cached = self.sections.get(name)
+        if cached is None or cached[0] != signature:
+            cached = self.sections[name] = (signature, build())
+        return cached[1]
+    
+    def draw(self, lines: List[str]):
+        """Show a frame, redrawing as little as possible"""
+        if not self.ansi:
+            if lines != self.frame:
+                self.stream.write("\n" + "\n".join(lines) + "\n")
+                self.frame = list(lines)
+            return
         
-        if self.upgrades:
-            print("Upgrades:")
-            for upgrade in self.upgrades:
-                print(f"  - {upgrade}")
+        try:
+            rows = os.get_terminal_size(self.stream.fileno()).lines
+        except (AttributeError, OSError, ValueError):
+            rows = 24  # Not a real terminal (e.g. a test stream)
+        if len(lines) + 4 > rows:
+            # Frame won't fit above a usable log area
+            self.close()
+            self.stream.write("\n" + "\n".join(lines) + "\n")
+            self.frame = []
+            return
         
-        if self.bandwidth_sources:
-            print("Bandwidth Sources:")
-            for bandwidth in self.bandwidth_sources:
-                print(f"  - {bandwidth}")
+        # Frames never shrink, so the scroll region only moves when a frame grows
+        height = max(len(lines), len(self.frame)) if self.pinned and rows == self.rows else len(lines)
+        lines = lines + [""] * (height - len(lines))
+        
+        fresh = not self.pinned or rows != self.rows
+        grown = not fresh and height != len(self.frame)
+        if fresh or grown:
+            changed = range(height)
+        else:
+            changed = [i for i in range(height) if lines[i] != self.frame[i]]
+            if not changed:
+                return
+        
+        out = ["\x1b7\x1b[?7l"]  # Save cursor, disable line wrap
+        if fresh:
+            out.append("\x1b[r\x1b[2J")
+        for i in changed:
+            out.append(f"\x1b[{i + 1};1H{lines[i]}\x1b[K")
+        if fresh or grown:
+            # Pin the frame above a scroll region that holds the game log
+            out.append(f"\x1b[{height + 1};1H{'─' * 50}\x1b[K\x1b[{height + 2};{rows}r")
+        out.append("\x1b[?7h")
+        if fresh:
+            out.append(f"\x1b[{height + 2};1H")
+        elif grown:
+            # The saved cursor may now sit inside the frame; continue the log at the bottom instead
+            out.append(f"\x1b[{rows};1H")
+        else:
+            out.append("\x1b8")  # Continue the log where it was
+        
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self.frame = lines
+        self.rows = rows
+        self.pinned = True
+    
+    def close(self):
+        """Release the scroll region and leave the cursor at the bottom of the screen"""
+        if self.ansi and self.pinned:
+            self.stream.write(f"\x1b[r\x1b[{self.rows};1H\n")
+            self.stream.flush()
+        self.pinned = False
+        self.frame = []
+
+class TurnRecord(NamedTuple):
+    turn: int
+    player: int               # Index of the player whose turn it was
+    actions: Tuple[str, ...]  # Cards played, in order
+    counters: Tuple[Tuple[int, ...], ...]  # Per player, in GameHistory.COUNTERS order
+
+# Histories with spilled turns not yet on disk, flushed at interpreter exit if a game dies mid-batch
+_unflushed_histories = set()
+
+def _flush_histories():
+    for history in list(_unflushed_histories):
+        history.flush()
+
+class GameHistory:
+    """The last `capacity` turns of a game, kept in preallocated ring buffers.
+
+    Memory stays constant however long a game runs. If `spill_path` is set,
+    turns that fall out of the buffer are appended to that file as compact
+    JSON lines tagged with `game_id`. Lines are written in small batches: at
+    most FLUSH_LINES at a time, and never held longer than FLUSH_SECONDS.
+    """
+
+    COUNTERS = ("uptime_points", "service_health", "bandwidth")
+    FLUSH_LINES = 8
+    FLUSH_SECONDS = 5.0
+    _atexit_registered = False
+    
+    def __init__(self, capacity: int = 32, players: int = 2, spill_path: Optional[str] = None,
+                 game_id: str = ""):
+        if capacity < 1:
+            raise ValueError("History capacity must be at least 1")
+        self.game_id = game_id
+        self.capacity = capacity
+        self.width = players * len(self.COUNTERS)
+        self.turns = array("i", [0]) * capacity
+        self.players = array("b", [0]) * capacity
+        self.counters = array("i", [0]) * (capacity * self.width)
+        self.actions = [()] * capacity
+        self.recorded = 0  # Total turns ever recorded
+        self.spill_path = spill_path
+        self.pending = []  # Spilled lines not yet written
+        self.pending_since = 0.0  # When the oldest pending line was spilled
+    
+    def __len__(self) -> int:
+        return min(self.recorded, self.capacity)
+    
+    def record(self, turn: int, player: int, actions: Tuple[str, ...], players: List[Player]):
+        """Store a finished turn, spilling the oldest one if the buffer is full"""
+        slot = self.recorded % self.capacity
+        if self.recorded >= self.capacity and self.spill_path:
+            import json
+            line = dict(game=self.game_id, **self._read(slot)._asdict())
+            self.pending.append(json.dumps(line, separators=(",", ":")))
+            if len(self.pending) == 1:
+                self.pending_since = time.monotonic()
+                self._track_unflushed()
+            if (len(self.pending) >= self.FLUSH_LINES
+                    or time.monotonic() - self.pending_since >= self.FLUSH_SECONDS):
+                self.flush()
+        
+        self.turns[slot] = turn
+        self.players[slot] = player
+        self.actions[slot] = actions
+        base = slot * self.width
+        for p in players:
+            for name in self.COUNTERS:
+                self.counters[base] = getattr(p, name)
+                base += 1
+        self.recorded += 1
+    
+    def _read(self, slot: int) -> TurnRecord:
+        base = slot * self.width
+        per_player = len(self.COUNTERS)
+        counters = tuple(tuple(self.counters[i:i + per_player])
+                         for i in range(base, base + self.width, per_player))
+        return TurnRecord(self.turns[slot], self.players[slot], self.actions[slot], counters)
+    
+    def recent(self, count: Optional[int] = None) -> List[TurnRecord]:
+        """Up to `count` most recent turns, oldest first"""
+        count = len(self) if count is None else min(count, len(self))
+        return [self._read(i % self.capacity) for i in range(self.recorded - count, self.recorded)]
+    
+    def last(self) -> Optional[TurnRecord]:
+        return self._read((self.recorded - 1) % self.capacity) if self.recorded else None
+    
+    def _track_unflushed(self):
+        if not GameHistory._atexit_registered:
+            import atexit
+            atexit.register(_flush_histories)
+            GameHistory._atexit_registered = True
+        _unflushed_histories.add(self)
+    
+    def flush(self):
+        """Write spilled turns to disk"""
+        if self.pending:
+            with open(self.spill_path, "a") as f:
+                f.write("\n".join(self.pending) + "\n")
+            self.pending = []
+        _unflushed_histories.discard(self)
 
 class StackMastersGame:
-    def __init__(self, player1: Player, player2: Player):
+    def __init__(self, player1: Player, player2: Player, history_size: int = 32,
+                 history_path: Optional[str] = None, rules: RuleConfig = STANDARD_RULES,
+                 game_id: Optional[str] = None):
         self.players = [player1, player2]
+        self.rules = rules.validate()
+        for player in self.players:
+            player.setup(self.rules)
         self.current_player = 0
         self.turn_count = 1
         self.game_over = False
         self.winner = None
+        self.ply = 0  # Turns taken by either player
+        self.incident_engine = get_incident_engine()
+        self.scheduled_incidents = []  # Heap of (due ply, sequence, player index, incident name, effect)
+        self.incident_sequence = 0
+        self.renderer = TerminalRenderer()
+        # Random bytes from the OS, so ids don't collide across runs and the game's RNG isn't touched
+        self.game_id = game_id or os.urandom(6).hex()
+        self.history = GameHistory(history_size, len(self.players), history_path, self.game_id)
+        self.turn_played = False  # Whether the current player has reached their main phase
     
     def check_win_conditions(self):
         """Check if game is over"""
+        win_uptime = self.rules.win_uptime
         for player in self.players:
-            if player.uptime_points >= 20:
+            if player.uptime_points >= win_uptime:
                 self.winner = player
                 self.game_over = True
-                print(f"\n🎉 {player.name} wins with 20 Uptime Points!")
+                print(f"\n🎉 {player.name} wins with {win_uptime} Uptime Points!")
                 return
             
             if player.service_health <= 0:
@@ -398,39 +816,93 @@ class StackMastersGame:
                 return
     
     def trigger_random_incident(self):
-        """Randomly trigger incidents based on security posture"""
+        """Roll an incident for the player starting their turn, so each player rolls once per round"""
         current = self.players[self.current_player]
+        rolled = self.incident_engine.roll(current, self.rules)
+        if rolled:
+            self.resolve_incident(self.current_player, *rolled)
+    
+    def resolve_incident(self, player_index: int, incident: Incident, effect: IncidentEffect):
+        """Mitigate an incident if affordable and worthwhile, then apply or schedule its effect"""
+        player = self.players[player_index]
+        print(f"\n🚨 INCIDENT for {player.name}: {incident}")
         
-        # Higher security posture = lower incident chance
-        incident_chance = max(10, 100 - current.security_posture)
+        amount = effect.amount
+        # Mitigation halves the damage; when the damage is itself bandwidth, only pay if the total loss drops
+        mitigated_loss = amount // 2
+        if effect.attribute == "bandwidth":
+            mitigated_loss += incident.mitigation_cost
+        if (incident.mitigation_cost and player.bandwidth >= incident.mitigation_cost
+                and mitigated_loss < amount):
+            player.bandwidth -= incident.mitigation_cost
+            amount //= 2
+            print(f"{player.name} spends {incident.mitigation_cost} bandwidth to mitigate {incident.name}!")
         
-        if random.randint(1, 100) <= incident_chance:
-            incidents = [
-                Incident("DDoS Attack", Severity.HIGH, "-3 Bandwidth next turn", 2),
-                Incident("Memory Leak", Severity.MODERATE, "-2 Service Health", 1),
-                Incident("SSL Certificate Expired", Severity.LOW, "-1 Uptime Point", 1),
-                Incident("Database Corruption", Severity.CRITICAL, "-5 Service Health", 3),
-            ]
-            
-            incident = random.choice(incidents)
-            print(f"\n🚨 INCIDENT: {incident}")
-            
-            # Apply incident effects (simplified)
-            if "Service Health" in incident.effect:
-                damage = int(incident.effect.split('-')[1].split()[0])
-                current.service_health -= damage
-                print(f"{current.name} loses {damage} Service Health!")
+        if amount <= 0:
+            return
+        
+        if effect.delayed:
+            # Players alternate, so the target's next turn is one or two plies away
+            due = self.ply + (2 if player_index == self.current_player else 1)
+            heapq.heappush(self.scheduled_incidents,
+                           (due, self.incident_sequence, player_index, incident.name,
+                            effect._replace(amount=amount)))
+            self.incident_sequence += 1
+            print(f"{incident.name} will hit {player.name} next turn!")
+        else:
+            self.apply_incident_effect(player, incident.name, effect.attribute, amount)
+    
+    def apply_incident_effect(self, player: Player, name: str, attribute: str, amount: int):
+        """Reduce one of a player's counters; only Service Health may drop below zero"""
+        value = getattr(player, attribute) - amount
+        if attribute != "service_health":
+            value = max(0, value)
+        setattr(player, attribute, value)
+        label = attribute.replace("_", " ").title()
+        print(f"{player.name} loses {amount} {label} from {name}!")
+    
+    def apply_scheduled_incidents(self):
+        """Apply scheduled incident effects that are due this turn"""
+        while self.scheduled_incidents and self.scheduled_incidents[0][0] <= self.ply:
+            _, _, player_index, name, effect = heapq.heappop(self.scheduled_incidents)
+            self.apply_incident_effect(self.players[player_index], name, effect.attribute, effect.amount)
+    
+    def record_turn(self):
+        """Add the current player's turn to the game history, if they got to play it"""
+        if not self.turn_played:
+            return
+        current = self.players[self.current_player]
+        self.history.record(self.turn_count, self.current_player, tuple(current.turn_actions), self.players)
+        current.turn_actions.clear()
+        self.turn_played = False
+    
+    def show_last_turn(self):
+        """Recap the most recently finished turn"""
+        record = self.history.last()
+        if record is None:
+            print("\nNo turns have been played yet.")
+            return
+        
+        player = self.players[record.player]
+        played = ", ".join(record.actions) if record.actions else "nothing"
+        print(f"\n⏪ Turn {record.turn} - {player.name} played: {played}")
+        for p, (uptime, health, bandwidth) in zip(self.players, record.counters):
+            print(f"   {p.name}: 💰 {uptime}/{self.rules.win_uptime} UP, "
+                  f"💚 {health}/{self.rules.starting_health} health, ⚡ {bandwidth} bandwidth")
     
     def next_turn(self):
         """Switch to next player's turn"""
+        self.record_turn()
         self.current_player = 1 - self.current_player
+        self.ply += 1
         if self.current_player == 0:
             self.turn_count += 1
         
         current = self.players[self.current_player]
         current.start_turn()
         
-        # Random incidents
+        # Incidents scheduled for this turn, then new random incidents
+        self.apply_scheduled_incidents()
         self.trigger_random_incident()
         
         self.check_win_conditions()
@@ -441,31 +913,32 @@ class StackMastersGame:
             return
             
         current = self.players[self.current_player]
+        self.turn_played = True
         
         # Check if current player is human or AI
         if not current.is_human:
             # AI turn
             print(f"\n{'='*50}")
             print(f"🤖 {current.name}'s turn (AI)")
-            current.show_infrastructure()
+            self.render_turn(current)
             current.ai_play_turn()
             return
         
         # Human turn
         print(f"\n{'='*50}")
-        current.show_hand()
-        current.show_infrastructure()
         
         while True:
+            self.render_turn(current)
             print(f"\n{current.name}, what would you like to do?")
             print("1. Play a card from hand")
             print("2. View detailed infrastructure")
             print("3. View opponent's infrastructure") 
             print("4. End turn")
             print("5. View game status")
+            print("6. Last turn recap")
             
             try:
-                choice = input("\nEnter your choice (1-5): ").strip()
+                choice = input("\nEnter your choice (1-6): ").strip()
                 
                 if choice == "1":
                     self.handle_play_card(current)
@@ -480,8 +953,10 @@ class StackMastersGame:
                     break
                 elif choice == "5":
                     self.show_game_status()
+                elif choice == "6":
+                    self.show_last_turn()
                 else:
-                    print("Invalid choice. Please enter 1-5.")
+                    print("Invalid choice. Please enter 1-6.")
                     
             except KeyboardInterrupt:
                 print("\nGame interrupted!")
@@ -492,6 +967,27 @@ class StackMastersGame:
         
         self.check_win_conditions()
     
+    def render_turn(self, player: Player):
+        """Draw the status frame for the player whose turn it is"""
+        index = self.players.index(player)
+        opponent = self.players[1 - index]
+        
+        win, health = self.rules.win_uptime, self.rules.starting_health
+        # Two short header lines, since the frame is drawn without wrapping on narrow terminals
+        lines = [f"🎮 Turn {self.turn_count} - {player.name}: ⚡ {player.bandwidth} (+{player.max_bandwidth}/turn) "
+                 f"💰 {player.uptime_points}/{win} UP 💚 {player.service_health}/{health}",
+                 f"   Opponent {opponent.name}: 💰 {opponent.uptime_points}/{win} UP 💚 {opponent.service_health}/{health}",
+                 ""]
+        
+        # Sections are only rebuilt when the cards behind them change
+        if player.is_human:
+            lines += self.renderer.section(f"hand:{index}", player.hand_signature(), player.hand_lines)
+            lines.append("")
+        lines += self.renderer.section(f"infrastructure:{index}", player.infrastructure_signature(),
+                                       player.infrastructure_lines)
+        
+        self.renderer.draw(lines)
+    
     def handle_play_card(self, player: Player):
         """Handle card playing with user input"""
         if not player.hand:
@@ -506,9 +1002,9 @@ class StackMastersGame:
         for i, card in enumerate(player.hand):
             if card.cost <= player.bandwidth:
                 affordable_cards.append(i)
-                print(f"{i + 1}. ✅ {card}")
+                print(f"{i + 1}. ✅ {card_label(card)}")
             else:
-                print(f"{i + 1}. ❌ {card} (Need {card.cost - player.bandwidth} more bandwidth)")
+                print(f"{i + 1}. ❌ {card_label(card)} (Need {card.cost - player.bandwidth} more bandwidth)")
         
         if not affordable_cards:
             print("No affordable cards!")
@@ -542,8 +1038,8 @@ class StackMastersGame:
         for i, player in enumerate(self.players):
             status = "👑 CURRENT TURN" if i == self.current_player else ""
             print(f"\n🔹 {player.name} {status}")
-            print(f"   💰 Uptime Points: {player.uptime_points}/20")
-            print(f"   💚 Service Health: {player.service_health}/20")
+            print(f"   💰 Uptime Points: {player.uptime_points}/{self.rules.win_uptime}")
+            print(f"   💚 Service Health: {player.service_health}/{self.rules.starting_health}")
             print(f"   ⚡ Bandwidth: {player.bandwidth} (Generates {player.max_bandwidth}/turn)")
             print(f"   😊 Team Morale: {player.team_morale}")
             print(f"   🛡️  Security Posture: {player.security_posture}")
@@ -631,7 +1127,7 @@ class StackMastersGame:
             print(f"\n🤖 {ai1_name} vs {ai2_name}")
             print("Watch the AIs battle it out!")
         
-        print("Goal: Reach 20 Uptime Points OR reduce opponent's Service Health to 0!")
+        print(f"Goal: Reach {self.rules.win_uptime} Uptime Points OR reduce opponent's Service Health to 0!")
         
         if mode == "3":  # AI vs AI
             input("\nPress Enter to start the AI battle...")
@@ -645,27 +1141,33 @@ class StackMastersGame:
         # Initial turn setup
         self.players[self.current_player].start_turn()
         
-        while not self.game_over:
-            current = self.players[self.current_player]
-            
-            self.play_interactive_turn()
-            
-            if not self.game_over:
-                # Handle turn transitions differently for AI vs Human
-                if current.is_human and not self.players[1 - self.current_player].is_human:
-                    # Human to AI transition
-                    input(f"\nPress Enter to let {self.players[1 - self.current_player].name} (AI) take their turn...")
-                elif not current.is_human and self.players[1 - self.current_player].is_human:
-                    # AI to Human transition  
-                    input(f"\nPress Enter for your turn...")
-                elif not current.is_human and not self.players[1 - self.current_player].is_human:
-                    # AI to AI transition
-                    input(f"\nPress Enter to continue to {self.players[1 - self.current_player].name}'s turn...")
-                else:
-                    # Human to Human transition
-                    input(f"\nPress Enter to end {current.name}'s turn...")
+        try:
+            while not self.game_over:
+                current = self.players[self.current_player]
                 
-                self.next_turn()
+                self.play_interactive_turn()
+                
+                if not self.game_over:
+                    # Handle turn transitions differently for AI vs Human
+                    if current.is_human and not self.players[1 - self.current_player].is_human:
+                        # Human to AI transition
+                        input(f"\nPress Enter to let {self.players[1 - self.current_player].name} (AI) take their turn...")
+                    elif not current.is_human and self.players[1 - self.current_player].is_human:
+                        # AI to Human transition  
+                        input(f"\nPress Enter for your turn...")
+                    elif not current.is_human and not self.players[1 - self.current_player].is_human:
+                        # AI to AI transition
+                        input(f"\nPress Enter to continue to {self.players[1 - self.current_player].name}'s turn...")
+                    else:
+                        # Human to Human transition
+                        input(f"\nPress Enter to end {current.name}'s turn...")
+                    
+                    self.next_turn()
+        finally:
+            # Hand the whole terminal back before the final summary
+            self.renderer.close()
+            self.record_turn()
+            self.history.flush()
         
         # Game over
         if self.winner:
@@ -683,6 +1185,25 @@ class StackMastersGame:
                 print(f"  Infrastructure: {len(player.engineers)} engineers, {len(player.services)} services")
         
         print(f"\nThanks for playing Stack Masters! 🚀")
+    
+    def play_simulated_game(self, max_turns: int = 60) -> Optional[int]:
+        """Play an AI vs AI game without prompts; return the winner's index, or None for a draw"""
+        self.players[self.current_player].start_turn()
+        
+        while not self.game_over and self.turn_count <= max_turns:
+            self.turn_played = True
+            self.players[self.current_player].ai_play_turn()
+            self.check_win_conditions()
+            
+            if not self.game_over:
+                self.next_turn()
+        
+        self.record_turn()
+        self.history.flush()
+        
+        if self.winner is None:
+            return None
+        return self.players.index(self.winner)
 
 # Sample deck creation for Stack Masters
 def create_stack_masters_deck() -> List[Card]:
@@ -775,11 +1296,561 @@ def create_stack_masters_deck() -> List[Card]:
     
     return deck
 
+# Card catalog: each card definition is constructed once per process, and decks refer to them by index
+class CardCatalog:
+    """Unique card definitions plus named deck templates that refer to them by index.
+
+    Drawn cards are cheap copies of a definition, made only when they're needed.
+    """
+
+    def __init__(self, cards: List[Card], decks: Dict[str, Tuple[int, ...]]):
+        self.cards = cards
+        self.decks = decks
+        self.index = {card.name: i for i, card in enumerate(cards)}
+    
+    @classmethod
+    def from_decks(cls, decks: Dict[str, List[Card]]) -> "CardCatalog":
+        """Build a catalog from constructed decks; cards are identified by name"""
+        cards = []
+        index = {}
+        templates = {}
+        for deck_name, deck in decks.items():
+            indices = []
+            for card in deck:
+                if card.name not in index:
+                    index[card.name] = len(cards)
+                    cards.append(card)
+                indices.append(index[card.name])
+            templates[deck_name] = tuple(indices)
+        return cls(cards, templates)
+    
+    def materialize(self, index: int) -> Card:
+        """A fresh card instance for one copy of a catalog entry"""
+        template = self.cards[index]
+        card = template.__class__.__new__(template.__class__)
+        card.__dict__.update(template.__dict__)
+        return card
+    
+    def deck(self, name: str = "standard") -> "LazyDeck":
+        return LazyDeck(self.decks[name], self)
+
+class LazyDeck:
+    """A deck of catalog entries; each card is only built the first time it is looked at.
+
+    Behaves like a list of cards: indexing, slicing, iteration and pop() all
+    return Card instances, and a card keeps its identity once built.
+    """
+
+    def __init__(self, indices, catalog: CardCatalog):
+        self.slots = list(indices)  # Catalog index, replaced by the Card once it is built
+        self.catalog = catalog
+    
+    def _card(self, position: int) -> Card:
+        slot = self.slots[position]
+        if isinstance(slot, int):
+            slot = self.slots[position] = self.catalog.materialize(slot)
+        return slot
+    
+    def __len__(self) -> int:
+        return len(self.slots)
+    
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self._card(i) for i in range(*position.indices(len(self.slots)))]
+        return self._card(position)
+    
+    def __iter__(self):
+        for position in range(len(self.slots)):
+            yield self._card(position)
+    
+    def copy(self) -> "LazyDeck":
+        """Same cards in the same order, but none shared: built cards go back to catalog indices"""
+        index = self.catalog.index
+        return LazyDeck([slot if isinstance(slot, int) else index[slot.name] for slot in self.slots],
+                        self.catalog)
+    
+    def pop(self, position: int = -1) -> Card:
+        card = self._card(position)
+        del self.slots[position]
+        return card
+    
+    def append(self, card: Card):
+        self.slots.append(card)
+    
+    def shuffle(self):
+        """Shuffle without building any cards"""
+        random.shuffle(self.slots)
+
+_catalog = None
+
+def get_catalog() -> CardCatalog:
+    global _catalog
+    if _catalog is None:
+        _catalog = CardCatalog.from_decks({"standard": create_stack_masters_deck()})
+    return _catalog
+
+# Headless simulation and deck optimization
+SIM_MAX_TURNS = 60  # Simulated games still running after this many turns count as draws
+SIM_CHUNK_GAMES = 8  # Games per worker task, so even the last few candidates use every worker
+
+Genome = Tuple[int, ...]  # Copies of each card pool entry, in pool order
+
+def get_card_pool() -> List[Card]:
+    """Unique card definitions from the catalog, in catalog order"""
+    catalog = get_catalog()
+    return catalog.cards
+
+def standard_genome() -> Genome:
+    """Card counts of the standard deck template"""
+    catalog = get_catalog()
+    counts = [0] * len(catalog.cards)
+    for index in catalog.decks["standard"]:
+        counts[index] += 1
+    return tuple(counts)
+
+def deck_to_genome(deck: List[Card]) -> Genome:
+    """Count the copies of each card pool entry in a deck"""
+    index = get_catalog().index
+    counts = [0] * len(index)
+    for card in deck:
+        counts[index[card.name]] += 1
+    return tuple(counts)
+
+def genome_to_deck(genome: Genome) -> LazyDeck:
+    """Build a playable deck; each copy becomes its own card instance when drawn"""
+    indices = [i for i, count in enumerate(genome) for _ in range(count)]
+    return LazyDeck(indices, get_catalog())
+
+def deck_hash(genome: Genome) -> str:
+    """Canonical deck hash: identical card counts give the same hash regardless of pool order"""
+    pool = get_card_pool()
+    entries = sorted(f"{pool[i].name}:{count}" for i, count in enumerate(genome) if count)
+    import hashlib
+    return hashlib.sha1("|".join(entries).encode("utf-8")).hexdigest()
+
+def load_gauntlet(path: str) -> List[Genome]:
+    """Read benchmark decks from a JSON list of {card name: copies} objects"""
+    import json
+    with open(path) as f:
+        decks = json.load(f)
+    if not isinstance(decks, list) or not decks:
+        raise ValueError(f"{path} must contain a non-empty list of decks")
+    
+    index = get_catalog().index
+    gauntlet = []
+    for deck in decks:
+        if not isinstance(deck, dict):
+            raise ValueError(f"Each deck in {path} must be an object of card name: copies")
+        counts = [0] * len(index)
+        for name, copies in deck.items():
+            if name not in index:
+                raise ValueError(f"Unknown card in {path}: {name!r}")
+            if not isinstance(copies, int) or isinstance(copies, bool) or copies < 0:
+                raise ValueError(f"Copies of {name!r} in {path} must be a whole number of 0 or more, got {copies!r}")
+            counts[index[name]] = copies
+        gauntlet.append(tuple(counts))
+    
+    sizes = {sum(counts) for counts in gauntlet}
+    if len(sizes) != 1 or 0 in sizes:
+        raise ValueError(f"Decks in {path} must all have the same, non-zero number of cards; got {sorted(sizes)}")
+    return gauntlet
+
+def describe_genome(genome: Genome) -> str:
+    """Human readable deck list grouped by card type"""
+    lines = []
+    for card_type in CardType:
+        entries = [f"{count}x {card.name}" for card, count in zip(get_card_pool(), genome)
+                   if count and card.type == card_type]
+        if entries:
+            lines.append(f"{card_type.value}: {', '.join(entries)}")
+    return "\n".join(lines)
+
+def simulate_game(genome1: Genome, genome2: Genome, seed: int, max_turns: int = SIM_MAX_TURNS,
+                  rules: RuleConfig = STANDARD_RULES) -> Tuple[Optional[int], int]:
+    """Play one silent AI vs AI game; return the winner's index (None for a draw) and the turns played"""
+    state = random.getstate()
+    random.seed(seed)
+    try:
+        import contextlib
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            player1 = Player("Player 1", genome_to_deck(genome1), is_human=False)
+            player2 = Player("Player 2", genome_to_deck(genome2), is_human=False)
+            game = StackMastersGame(player1, player2, rules=rules)
+            winner = game.play_simulated_game(max_turns)
+            return winner, game.turn_count
+    finally:
+        random.setstate(state)
+
+# Worker state, set once per process by _init_gauntlet_worker
+_worker_gauntlet = []
+_worker_settings = (0, SIM_MAX_TURNS)
+
+def _init_gauntlet_worker(gauntlet: List[Genome], base_seed: int, max_turns: int):
+    global _worker_gauntlet, _worker_settings
+    _worker_gauntlet = gauntlet
+    _worker_settings = (base_seed, max_turns)
+
+def _play_gauntlet_games(task: Tuple[Genome, int, int]) -> float:
+    """Play games [start, stop) of a candidate's gauntlet schedule; return its score (draws count half)"""
+    genome, start, stop = task
+    base_seed, max_turns = _worker_settings
+    score = 0.0
+    for game_index in range(start, stop):
+        # Game i always uses the same opponent, seat and seed, so every candidate faces
+        # identical conditions and cached results can be extended later
+        opponent = _worker_gauntlet[game_index % len(_worker_gauntlet)]
+        seat = (game_index // len(_worker_gauntlet)) % 2
+        players = (genome, opponent) if seat == 0 else (opponent, genome)
+        winner, _ = simulate_game(players[0], players[1], base_seed + game_index, max_turns)
+        if winner is None:
+            score += 0.5
+        elif winner == seat:
+            score += 1.0
+    return score
+
+class DeckOptimizer:
+    """Genetic search over deck compositions, scored by win rate against a benchmark gauntlet.
+
+    Each generation is evaluated with successive halving: every candidate plays
+    ``min_games`` games, the best 1/``eta`` survive to play ``eta`` times as many,
+    and so on up to ``max_games``. Results are cached by canonical deck hash, and
+    the whole search state can be saved after each generation and resumed.
+    """
+
+    STATE_VERSION = 1
+
+    def __init__(self, gauntlet: Optional[List[Genome]] = None, population_size: int = 24,
+                 elite: int = 2, mutation_swaps: int = 3, max_copies: int = 4,
+                 min_games: int = 8, max_games: int = 128, eta: int = 2,
+                 seed: int = 0, max_turns: int = SIM_MAX_TURNS, workers: Optional[int] = None,
+                 state_path: Optional[str] = None):
+        self.pool = get_card_pool()
+        self.gauntlet = [tuple(g) for g in gauntlet] if gauntlet else [standard_genome()]
+        # Candidates are built to the gauntlet's deck size, so they can seed from and compete with it
+        sizes = {sum(g) for g in self.gauntlet}
+        if len(sizes) != 1:
+            raise ValueError(f"Gauntlet decks must all be the same size, got {sorted(sizes)}")
+        self.deck_size = sizes.pop()
+        self.population_size = population_size
+        self.elite = elite
+        self.mutation_swaps = mutation_swaps
+        self.max_copies = max(max_copies, max(max(g) for g in self.gauntlet))
+        if self.deck_size < 1 or self.deck_size > self.max_copies * len(self.pool):
+            raise ValueError(f"Can't build {self.deck_size}-card decks from {len(self.pool)} cards "
+                             f"with at most {self.max_copies} copies each")
+        self.min_games = min_games
+        self.max_games = max_games
+        self.eta = eta
+        self.seed = seed
+        self.max_turns = max_turns
+        self.workers = workers
+        self.state_path = state_path
+        
+        self.rng = random.Random(seed)
+        self.generation = 0
+        self.population = []  # List of genomes
+        self.fitness_cache = {}  # deck hash -> [score, games played]
+        self.best = None  # (win rate, games, genome)
+        
+        if state_path and os.path.exists(state_path):
+            self.load_state(state_path)
+    
+    def _settings(self) -> Dict:
+        """Settings that cached fitness values depend on"""
+        return {
+            "pool": [card.name for card in self.pool],
+            "gauntlet": [list(g) for g in self.gauntlet],
+            "seed": self.seed,
+            "max_turns": self.max_turns,
+        }
+    
+    def save_state(self, path: str):
+        """Write the search state to disk atomically"""
+        state = {
+            "version": self.STATE_VERSION,
+            "settings": self._settings(),
+            "generation": self.generation,
+            "population": [list(g) for g in self.population],
+            "fitness_cache": self.fitness_cache,
+            "best": [self.best[0], self.best[1], list(self.best[2])] if self.best else None,
+            "rng": [self.rng.getstate()[0], list(self.rng.getstate()[1]), self.rng.getstate()[2]],
+        }
+        import json
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    
+    def load_state(self, path: str):
+        """Resume a search saved by save_state"""
+        import json
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("version") != self.STATE_VERSION:
+            raise ValueError(f"Unsupported optimizer state version in {path}")
+        if state["settings"] != self._settings():
+            raise ValueError(f"{path} was saved with a different card pool, gauntlet, seed or turn limit")
+        
+        self.generation = state["generation"]
+        self.population = [tuple(g) for g in state["population"]]
+        self.fitness_cache = state["fitness_cache"]
+        if state["best"]:
+            self.best = (state["best"][0], state["best"][1], tuple(state["best"][2]))
+        version, internal, gauss = state["rng"]
+        self.rng.setstate((version, tuple(internal), gauss))
+    
+    def win_rate(self, genome: Genome) -> float:
+        score, games = self.fitness_cache.get(deck_hash(genome), (0.0, 0))
+        return score / games if games else 0.0
+    
+    def random_genome(self) -> Genome:
+        counts = [0] * len(self.pool)
+        self._repair(counts)
+        return tuple(counts)
+    
+    def _repair(self, counts: List[int]):
+        """Adjust counts in place until the deck has deck_size cards within copy limits"""
+        while sum(counts) > self.deck_size:
+            counts[self.rng.choice([i for i, c in enumerate(counts) if c > 0])] -= 1
+        while sum(counts) < self.deck_size:
+            counts[self.rng.choice([i for i, c in enumerate(counts) if c < self.max_copies])] += 1
+    
+    def crossover(self, parent1: Genome, parent2: Genome) -> Genome:
+        counts = [a if self.rng.random() < 0.5 else b for a, b in zip(parent1, parent2)]
+        self._repair(counts)
+        return tuple(counts)
+    
+    def mutate(self, genome: Genome) -> Genome:
+        """Move a few single copies from one card to another"""
+        counts = list(genome)
+        for _ in range(self.rng.randint(1, self.mutation_swaps)):
+            donors = [i for i, c in enumerate(counts) if c > 0]
+            receivers = [i for i, c in enumerate(counts) if c < self.max_copies]
+            src, dst = self.rng.choice(donors), self.rng.choice(receivers)
+            if src != dst:
+                counts[src] -= 1
+                counts[dst] += 1
+        return tuple(counts)
+    
+    def initial_population(self) -> List[Genome]:
+        population = list(self.gauntlet[:1])
+        while len(population) < self.population_size:
+            if len(population) % 2:
+                population.append(self.mutate(self.gauntlet[0]))
+            else:
+                population.append(self.random_genome())
+        return population
+    
+    def _ensure_games(self, genomes: List[Genome], games: int, executor):
+        """Play games until every genome has at least `games` results in the cache"""
+        tasks = []
+        for genome in genomes:
+            played = self.fitness_cache.get(deck_hash(genome), (0.0, 0))[1]
+            for start in range(played, games, SIM_CHUNK_GAMES):
+                tasks.append((genome, start, min(start + SIM_CHUNK_GAMES, games)))
+        
+        if executor is None:
+            scores = map(_play_gauntlet_games, tasks)
+        else:
+            scores = executor.map(_play_gauntlet_games, tasks)
+        
+        for (genome, start, stop), score in zip(tasks, scores):
+            entry = self.fitness_cache.setdefault(deck_hash(genome), [0.0, 0])
+            entry[0] += score
+            entry[1] += stop - start
+    
+    def successive_halving(self, population: List[Genome], executor) -> List[Genome]:
+        """Evaluate a population and return it sorted from strongest to weakest"""
+        unique = list({deck_hash(g): g for g in population}.values())
+        rung_reached = {}
+        survivors = unique
+        games = self.min_games
+        rung = 0
+        
+        while True:
+            self._ensure_games(survivors, games, executor)
+            survivors.sort(key=self.win_rate, reverse=True)
+            for genome in survivors:
+                rung_reached[deck_hash(genome)] = rung
+            if len(survivors) <= 1 or games >= self.max_games:
+                break
+            survivors = survivors[:max(1, -(-len(survivors) // self.eta))]
+            games = min(games * self.eta, self.max_games)
+            rung += 1
+        
+        return sorted(population, key=lambda g: (rung_reached[deck_hash(g)], self.win_rate(g)),
+                      reverse=True)
+    
+    def _tournament(self, ranked: List[Genome], size: int = 3) -> Genome:
+        # ranked is sorted best first, so the lowest sampled position wins
+        return ranked[min(self.rng.sample(range(len(ranked)), min(size, len(ranked))))]
+    
+    def next_population(self, ranked: List[Genome]) -> List[Genome]:
+        population = ranked[:self.elite]
+        while len(population) < self.population_size:
+            child = self.crossover(self._tournament(ranked), self._tournament(ranked))
+            population.append(self.mutate(child))
+        return population
+    
+    def run(self, generations: int) -> Genome:
+        """Evolve for the given number of generations (counting any resumed ones) and return the best deck"""
+        if not self.population:
+            self.population = self.initial_population()
+        
+        executor = None
+        if self.workers != 1:
+            import concurrent.futures
+            executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_gauntlet_worker,
+                initargs=(self.gauntlet, self.seed, self.max_turns))
+        else:
+            _init_gauntlet_worker(self.gauntlet, self.seed, self.max_turns)
+        
+        try:
+            while self.generation < generations:
+                ranked = self.successive_halving(self.population, executor)
+                leader = ranked[0]
+                games = self.fitness_cache[deck_hash(leader)][1]
+                if self.best is None or (games, self.win_rate(leader)) >= (self.best[1], self.best[0]):
+                    self.best = (self.win_rate(leader), games, leader)
+                
+                self.generation += 1
+                print(f"🧬 Generation {self.generation}: best win rate {self.win_rate(leader):.1%} "
+                      f"over {games} games ({len(self.fitness_cache)} decks evaluated)")
+                
+                self.population = self.next_population(ranked)
+                if self.state_path:
+                    self.save_state(self.state_path)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        return self.best[2] if self.best else self.population[0]
+
+# Rule variant sweeps
+class SweepResult(NamedTuple):
+    rules: RuleConfig
+    games: int
+    first_player_wins: int
+    second_player_wins: int
+    draws: int
+    average_turns: float
+
+def rule_variants(grid: Dict[str, List[int]], base: RuleConfig = STANDARD_RULES) -> List[RuleConfig]:
+    """Every combination of the grid's values, applied on top of the base rules"""
+    unknown = set(grid) - set(RuleConfig._fields)
+    if unknown:
+        raise ValueError(f"Unknown rule(s): {', '.join(sorted(unknown))}")
+    names = list(grid)
+    return [base._replace(**dict(zip(names, values))).validate()
+            for values in itertools.product(*(grid[name] for name in names))]
+
+# Worker state, set once per process by _init_sweep_worker
+_worker_sweep = ([], [], SIM_MAX_TURNS)
+
+def _init_sweep_worker(matchups: List[Tuple[Genome, Genome]], seeds: List[int], max_turns: int):
+    global _worker_sweep
+    _worker_sweep = (matchups, seeds, max_turns)
+
+def _play_rule_variant(rules: RuleConfig) -> SweepResult:
+    """Play every shared matchup with every shared seed under one rule variant"""
+    matchups, seeds, max_turns = _worker_sweep
+    results = [0, 0, 0]  # First player wins, second player wins, draws
+    turns = 0
+    for genome1, genome2 in matchups:
+        for seed in seeds:
+            winner, played = simulate_game(genome1, genome2, seed, max_turns, rules)
+            results[2 if winner is None else winner] += 1
+            turns += played
+    games = sum(results)
+    return SweepResult(rules, games, results[0], results[1], results[2], turns / games if games else 0.0)
+
+def sweep_rules(variants: List[RuleConfig], matchups: Optional[List[Tuple[Genome, Genome]]] = None,
+                seeds: Optional[List[int]] = None, max_turns: int = SIM_MAX_TURNS,
+                workers: Optional[int] = None) -> List[SweepResult]:
+    """Simulate every rule variant in parallel on the same decks and seeds, so variants are directly comparable.
+
+    Decks and seeds are sent to each worker process once; tasks only carry the rules.
+    """
+    if matchups is None:
+        matchups = [(standard_genome(), standard_genome())]
+    seeds = list(range(32)) if seeds is None else list(seeds)
+    settings = (matchups, seeds, max_turns)
+    
+    if workers == 1:
+        _init_sweep_worker(*settings)
+        return [_play_rule_variant(rules) for rules in variants]
+    
+    import concurrent.futures
+    # A few chunks per worker keeps them all busy without a round trip per variant
+    chunksize = max(1, len(variants) // (4 * (workers or os.cpu_count() or 1)))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_sweep_worker,
+                                                initargs=settings) as executor:
+        return list(executor.map(_play_rule_variant, variants, chunksize=chunksize))
+
 # Example usage - Interactive Game with Player Type Selection
 if __name__ == "__main__":
-    # Create two players with Stack Masters decks
-    deck1 = create_stack_masters_deck()
-    deck2 = create_stack_masters_deck()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Stack Masters - The DevOps/SRE Trading Card Game")
+    subcommands = parser.add_subparsers(dest="command")
+    
+    optimize = subcommands.add_parser("optimize", help="evolve decks against a benchmark gauntlet")
+    optimize.add_argument("--generations", type=int, default=20)
+    optimize.add_argument("--population", type=int, default=24)
+    optimize.add_argument("--min-games", type=int, default=8)
+    optimize.add_argument("--max-games", type=int, default=128)
+    optimize.add_argument("--seed", type=int, default=0)
+    optimize.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    optimize.add_argument("--state", default=None, help="save each generation here and resume from it")
+    optimize.add_argument("--gauntlet", default=None, metavar="FILE",
+                          help="JSON list of benchmark decks, each {card name: copies} (default: the sample deck)")
+    
+    sweep = subcommands.add_parser("sweep", help="simulate a grid of rule variants")
+    sweep.add_argument("--set", action="append", default=[], metavar="RULE=V1,V2,...",
+                       help=f"values to try for a rule; rules: {', '.join(RuleConfig._fields)}")
+    sweep.add_argument("--seeds", type=int, default=32, help="games per variant, shared by all variants")
+    sweep.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    
+    args = parser.parse_args()
+    
+    if args.command == "sweep":
+        if args.seeds < 1:
+            parser.error("--seeds must be at least 1")
+        grid = {}
+        try:
+            for setting in args.set:
+                name, _, values = setting.partition("=")
+                grid[name.strip()] = [int(value) for value in values.split(",")]
+            variants = rule_variants(grid)
+        except ValueError as e:
+            parser.error(str(e))
+        
+        print(f"🧪 Sweeping {len(variants)} rule variant(s), {args.seeds} games each...")
+        for result in sweep_rules(variants, seeds=range(args.seeds), workers=args.workers):
+            changes = ", ".join(f"{name}={getattr(result.rules, name)}" for name in grid) or "standard rules"
+            print(f"{changes}: P1 {result.first_player_wins / result.games:.1%}, "
+                  f"P2 {result.second_player_wins / result.games:.1%}, "
+                  f"draws {result.draws / result.games:.1%}, avg {result.average_turns:.1f} turns")
+        raise SystemExit(0)
+    
+    if args.command == "optimize":
+        try:
+            gauntlet = load_gauntlet(args.gauntlet) if args.gauntlet else None
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        optimizer = DeckOptimizer(gauntlet=gauntlet, population_size=args.population,
+                                  min_games=args.min_games, max_games=args.max_games, seed=args.seed,
+                                  workers=args.workers, state_path=args.state)
+        best = optimizer.run(args.generations)
+        print(f"\n🏆 Best deck ({optimizer.win_rate(best):.1%} win rate vs gauntlet):")
+        print(describe_genome(best))
+        raise SystemExit(0)
+    
+    # Create two players with Stack Masters decks from the card catalog
+    catalog = get_catalog()
+    deck1 = catalog.deck()
+    deck2 = catalog.deck()
     
     player1 = Player("Player 1", deck1, is_human=True)  # Will be configured in setup
     player2 = Player("Player 2", deck2, is_human=True)  # Will be configured in setup